@@ -0,0 +1,442 @@
+"""
+Load-testing harness for the attendance app.
+
+Reproduces the meal-time rush: many students hitting /submit_attendance at
+the same time while others keep refreshing the index page. The app is started
+locally in an isolated working directory (so the real data/attendance.txt is
+never touched), driven with concurrent traffic, and afterwards the storage file
+is checked so that every acknowledged submission appears exactly once.
+
+Examples:
+    python load_test.py --server werkzeug --concurrency 50 --requests 2000
+    python load_test.py --server gunicorn --workers 4 --submit-ratio 0.8
+
+Exits with status 0 when the run passes and 1 when it fails.
+"""
+import os
+import sys
+import json
+import math
+import zlib
+import base64
+import time
+import random
+import socket
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST = "127.0.0.1"
+NAME_PREFIX = "loadtest"
+
+
+def find_free_port():
+    """Ask the OS for a free TCP port on the loopback interface"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def start_server(server, workers, port, workdir):
+    """
+    Start the app in a subprocess
+
+    Args:
+        server (str): 'werkzeug' (threaded dev server) or 'gunicorn'
+        workers (int): Number of gunicorn worker processes (ignored for werkzeug)
+        port (int): Port to listen on
+        workdir (str): Working directory for the server; data/ is created here
+
+    Returns:
+        tuple: (subprocess.Popen, path to the server log file)
+    """
+    if server == "werkzeug":
+        code = ("from app import app; "
+                f"app.run(host='{HOST}', port={port}, threaded=True, debug=False)")
+        cmd = [sys.executable, "-c", code]
+    elif server == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn",
+               "--workers", str(workers),
+               "--bind", f"{HOST}:{port}",
+               "app:app"]
+    else:
+        raise ValueError(f"Unknown server: {server}")
+
+    env = os.environ.copy()
+    env["PYTHONPATH"] = REPO_DIR + os.pathsep + env.get("PYTHONPATH", "")
+
+    log_path = os.path.join(workdir, "server.log")
+    log_file = open(log_path, "w")
+    process = subprocess.Popen(cmd, cwd=workdir, env=env,
+                               stdout=log_file, stderr=subprocess.STDOUT)
+    log_file.close()
+    return process, log_path
+
+
+def stop_server(process):
+    """Terminate the server subprocess, killing it if it does not exit"""
+    if process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def wait_for_server(process, port, timeout):
+    """Poll the index page until the server answers or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            conn = http.client.HTTPConnection(HOST, port, timeout=2)
+            conn.request("GET", "/")
+            status = conn.getresponse().status
+            conn.close()
+            if status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def read_flash_categories(response):
+    """
+    Read the flashed message categories from the Flask session cookie
+
+    The app redirects after every submit, including on validation errors and
+    caught exceptions, so the outcome is only visible in the flashed message.
+    The session cookie is signed but not encrypted, so its payload can be
+    decoded without the secret key.
+
+    Returns:
+        list: Flash categories (e.g. 'success', 'danger'), empty if none found
+    """
+    cookie = SimpleCookie()
+    for header in response.msg.get_all("Set-Cookie") or []:
+        try:
+            cookie.load(header)
+        except Exception:
+            continue
+    if "session" not in cookie:
+        return []
+
+    value = cookie["session"].value
+    compressed = value.startswith(".")
+    if compressed:
+        value = value[1:]
+    payload = value.split(".")[0]
+    try:
+        raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        if compressed:
+            raw = zlib.decompress(raw)
+        session_data = json.loads(raw)
+    except (ValueError, zlib.error):
+        return []
+
+    categories = []
+    for flash in session_data.get("_flashes", []) if isinstance(session_data, dict) else []:
+        # Flask tags tuples as {" t": [category, message]}
+        if isinstance(flash, dict):
+            flash = flash.get(" t", [])
+        if isinstance(flash, list) and flash:
+            categories.append(flash[0])
+    return categories
+
+
+def send_request(port, operation, student_name, timeout):
+    """
+    Send a single request and time it
+
+    A fresh connection is opened per request, like separate student browsers.
+    Redirects are not followed, so a submit is measured on its own; it only
+    counts as successful when the server flashed a 'success' message.
+
+    Returns:
+        dict: operation, student name, latency in seconds, success flag and error
+    """
+    start = time.perf_counter()
+    try:
+        conn = http.client.HTTPConnection(HOST, port, timeout=timeout)
+        if operation == "submit":
+            body = urlencode({
+                "student_name": student_name,
+                "attendance_status": "Coming",
+                "breakfast": "on",
+                "lunch": "on",
+                "dinner": "on",
+            })
+            conn.request("POST", "/submit_attendance", body=body,
+                         headers={"Content-Type": "application/x-www-form-urlencoded"})
+            expected_status = 302
+        else:
+            conn.request("GET", "/")
+            expected_status = 200
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        ok = response.status == expected_status
+        error = None if ok else f"HTTP {response.status}"
+        if ok and operation == "submit":
+            categories = read_flash_categories(response)
+            if "danger" in categories:
+                ok, error = False, "flash: danger"
+            elif "success" not in categories:
+                ok, error = False, "no success flash"
+    except (OSError, http.client.HTTPException) as e:
+        ok = False
+        error = type(e).__name__
+    return {
+        "operation": operation,
+        "student_name": student_name,
+        "latency": time.perf_counter() - start,
+        "ok": ok,
+        "error": error,
+    }
+
+
+def run_load(port, total_requests, concurrency, submit_ratio, timeout, seed, run_id):
+    """
+    Drive a mix of submit and index-view traffic against the server
+
+    Returns:
+        tuple: (list of result dicts, elapsed wall-clock seconds)
+    """
+    rng = random.Random(seed)
+    plan = []
+    submit_count = 0
+    for _ in range(total_requests):
+        if rng.random() < submit_ratio:
+            submit_count += 1
+            plan.append(("submit", f"{NAME_PREFIX}-{run_id}-{submit_count:06d}"))
+        else:
+            plan.append(("index", None))
+
+    # Release all workers at once to mimic the rush
+    start_gate = threading.Event()
+
+    def worker(item):
+        start_gate.wait()
+        return send_request(port, item[0], item[1], timeout)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(worker, item) for item in plan]
+        start = time.perf_counter()
+        start_gate.set()
+        results = [f.result() for f in futures]
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(results, elapsed):
+    """Calculate throughput, latency percentiles and error rate"""
+    summary = {
+        "requests": len(results),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(results) / elapsed if elapsed else 0.0,
+        "errors": sum(1 for r in results if not r["ok"]),
+        "operations": {},
+    }
+    summary["error_rate"] = summary["errors"] / len(results) if results else 0.0
+
+    for operation in ("submit", "index"):
+        op_results = [r for r in results if r["operation"] == operation]
+        latencies = [r["latency"] * 1000 for r in op_results]
+        errors = {}
+        for r in op_results:
+            if not r["ok"]:
+                errors[r["error"]] = errors.get(r["error"], 0) + 1
+        summary["operations"][operation] = {
+            "count": len(op_results),
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": max(latencies) if latencies else 0.0,
+            "errors": errors,
+        }
+    all_latencies = [r["latency"] * 1000 for r in results]
+    summary["p99_ms"] = percentile(all_latencies, 99)
+    return summary
+
+
+def verify_records(attendance_file, results, run_id):
+    """
+    Check that every acknowledged submission is stored exactly once
+
+    Submissions that failed on the client side may or may not have been stored,
+    so they are reported separately and not counted as missing.
+
+    Returns:
+        dict: missing, duplicated and unexpected student names
+    """
+    acknowledged = {r["student_name"] for r in results
+                    if r["operation"] == "submit" and r["ok"]}
+
+    try:
+        with open(attendance_file, "r") as f:
+            data = json.loads(f.read().strip() or "{}")
+    except (OSError, json.JSONDecodeError) as e:
+        logging.error(f"Could not read {attendance_file}: {str(e)}")
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    counts = {}
+    prefix = f"{NAME_PREFIX}-{run_id}-"
+    for records in data.values():
+        for record in records:
+            name = record.get("student_name", "") if isinstance(record, dict) else ""
+            if name.startswith(prefix):
+                counts[name] = counts.get(name, 0) + 1
+
+    return {
+        "acknowledged": len(acknowledged),
+        "stored": sum(counts.values()),
+        "missing": sorted(acknowledged - set(counts)),
+        "duplicated": sorted(name for name, count in counts.items() if count > 1),
+        "unexpected": sorted(set(counts) - acknowledged),
+    }
+
+
+def print_report(args, summary, integrity):
+    """Print a human-readable report of the run"""
+    logging.info("")
+    logging.info(f"Server: {args.server}"
+                 + (f" ({args.workers} workers)" if args.server == "gunicorn" else ""))
+    logging.info(f"Requests: {summary['requests']}  Concurrency: {args.concurrency}  "
+                 f"Submit ratio: {args.submit_ratio:.2f}")
+    logging.info(f"Elapsed: {summary['elapsed_s']:.2f}s  "
+                 f"Throughput: {summary['throughput_rps']:.1f} req/s")
+    logging.info(f"Errors: {summary['errors']} ({summary['error_rate']:.2%})")
+    for operation, stats in summary["operations"].items():
+        logging.info(f"  {operation:<6} n={stats['count']:<6} "
+                     f"p50={stats['p50_ms']:.1f}ms p90={stats['p90_ms']:.1f}ms "
+                     f"p99={stats['p99_ms']:.1f}ms max={stats['max_ms']:.1f}ms")
+        for error, count in sorted(stats["errors"].items()):
+            logging.info(f"         {error}: {count}")
+    logging.info(f"Records: {integrity['acknowledged']} acknowledged, "
+                 f"{integrity['stored']} stored, {len(integrity['missing'])} missing, "
+                 f"{len(integrity['duplicated'])} duplicated, "
+                 f"{len(integrity['unexpected'])} stored from failed requests")
+
+
+def evaluate(args, summary, integrity):
+    """Return a list of reasons the run failed (empty if it passed)"""
+    failures = []
+    if integrity["missing"]:
+        failures.append(f"{len(integrity['missing'])} acknowledged records missing")
+    if integrity["duplicated"]:
+        failures.append(f"{len(integrity['duplicated'])} records stored more than once")
+    if summary["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {summary['error_rate']:.2%} above "
+                        f"{args.max_error_rate:.2%}")
+    if args.max_p99_ms is not None and summary["p99_ms"] > args.max_p99_ms:
+        failures.append(f"p99 latency {summary['p99_ms']:.1f}ms above "
+                        f"{args.max_p99_ms:.1f}ms")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Simulate the meal-time submission rush against the attendance app")
+    parser.add_argument("--server", choices=["werkzeug", "gunicorn"], default="werkzeug",
+                        help="Server used to run the app (default: werkzeug)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Number of gunicorn worker processes (default: 4)")
+    parser.add_argument("--requests", type=int, default=1000,
+                        help="Total number of requests to send (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=50,
+                        help="Number of concurrent clients (default: 50)")
+    parser.add_argument("--submit-ratio", type=float, default=0.7,
+                        help="Fraction of requests that are submissions, the rest "
+                             "are index views (default: 0.7)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Per-request timeout in seconds (default: 30)")
+    parser.add_argument("--max-error-rate", type=float, default=0.0,
+                        help="Highest error rate that still passes (default: 0)")
+    parser.add_argument("--max-p99-ms", type=float, default=None,
+                        help="Highest overall p99 latency in ms that still passes")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Random seed for the request mix")
+    parser.add_argument("--workdir", default=None,
+                        help="Directory the server runs in; kept after the run. "
+                             "Defaults to a temporary directory that is removed")
+    parser.add_argument("--json", action="store_true",
+                        help="Also print the full results as JSON")
+    args = parser.parse_args(argv)
+    if not 0.0 <= args.submit_ratio <= 1.0:
+        parser.error("--submit-ratio must be between 0 and 1")
+    if args.requests < 1 or args.concurrency < 1 or args.workers < 1:
+        parser.error("--requests, --concurrency and --workers must be positive")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    run_id = time.strftime("%Y%m%d%H%M%S")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="attendance-loadtest-")
+    os.makedirs(workdir, exist_ok=True)
+    attendance_file = os.path.join(workdir, "data", "attendance.txt")
+
+    try:
+        port = find_free_port()
+        process, log_path = start_server(args.server, args.workers, port, workdir)
+        try:
+            if not wait_for_server(process, port, timeout=30):
+                logging.error(f"Server did not start, see {log_path}")
+                with open(log_path, "r") as f:
+                    sys.stderr.write(f.read()[-2000:])
+                return 1
+
+            logging.info(f"Server running on {HOST}:{port} in {workdir}")
+            results, elapsed = run_load(port, args.requests, args.concurrency,
+                                        args.submit_ratio, args.timeout, args.seed, run_id)
+        finally:
+            stop_server(process)
+
+        summary = summarize(results, elapsed)
+        integrity = verify_records(attendance_file, results, run_id)
+    finally:
+        # Only remove the directory we created; a user-supplied --workdir is kept
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(args, summary, integrity)
+
+    failures = evaluate(args, summary, integrity)
+    if args.json:
+        print(json.dumps({"summary": summary, "integrity": integrity,
+                          "failures": failures}, indent=2))
+
+    if failures:
+        logging.info("FAIL: " + "; ".join(failures))
+        return 1
+    logging.info("PASS")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())